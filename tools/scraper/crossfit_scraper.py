@@ -6,48 +6,496 @@ A script to scrape CrossFit Workout of the Day pages and follow backlinks
 chronologically to extract workout data.
 
 Usage:
-    python crossfit_scraper.py [--start-date YYMMDD] [--max-count N] [--output-dir DIR]
+    python crossfit_scraper.py [--start-date YYMMDD] [--max-count N] [--output-dir DIR] [--concurrency N]
     python crossfit_scraper.py --help
 
 Requirements:
     - requests
-    - beautifulsoup4
+    - brotli (optional, smaller transfers)
+    - requests-cache
     - lxml
+    - orjson (optional, faster JSON parsing)
 """
 
 import requests
+import requests_cache
 import json
 import re
 import time
 import os
 import sys
 import argparse
+import atexit
+import bisect
+import itertools
 import logging
-from datetime import datetime, timedelta
+import logging.handlers
+import queue
+import threading
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List, Optional, Any
+
+import lxml.html
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson else json.loads
+
+
+def json_default(obj: Any) -> Any:
+    """Serialize values JSON has no type for (dataclasses, datetime)."""
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def json_dumps(data: Any, indent: bool = True) -> bytes:
+    """Serialize data as UTF-8 JSON, indented or on a single line."""
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=json_default, option=option)
+    if indent:
+        text = json.dumps(data, default=json_default, indent=2, ensure_ascii=False)
+    else:
+        text = json.dumps(data, default=json_default, separators=(',', ':'), ensure_ascii=False)
+    return text.encode('utf-8')
+
+
+# Trailing YYMMDD date segment of a workout URL
+DATE_RE = re.compile(r'/(\d{6})$')
+
+# Workout-looking lines in the main content text, tried in order
+WORKOUT_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r'(?:Workout|WOD).*?(?=\n\n|$)',
+        r'(?:Round|Time|AMRAP|EMOM|RFT).*?(?=\n\n|$)',
+        r'\d+.*?(?:reps|rounds?|cal|lb|kg|m).*?(?=\n\n|$)',
+    )
+)
+
+# Assignment that carries the page's JSON state
+PRELOADED_STATE_MARKER = b'window.__PRELOADED_STATE__'
+
+# JSON string literals (skipped whole) and the braces that nest objects
+JSON_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}]')
+
+# Parser that skips nodes extraction never reads: comments, processing
+# instructions, whitespace-only text and the id lookup table
+HTML_PARSER_OPTIONS = dict(
+    remove_blank_text=True,
+    remove_comments=True,
+    remove_pis=True,
+    collect_ids=False,
+)
+HTML_PARSER = lxml.html.HTMLParser(**HTML_PARSER_OPTIONS)
+
+# Pages that do not declare a charset are UTF-8 (as the JSON state is
+# decoded); left alone, libxml2 would read their bytes as Latin-1
+UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8', **HTML_PARSER_OPTIONS)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.IGNORECASE)
+
+# Links to movement demos, e.g. /essentials/the-kettlebell-snatch, relative
+# or absolute; find_movement_fragments uses the same test on raw strings
+MOVEMENT_PATH = '/essentials/'
+MOVEMENT_XPATH = etree.XPath(f".//a[contains(@href, '{MOVEMENT_PATH}')]")
+
+# Workout content candidates, selected in a single tree walk
+WORKOUT_CLASSES = ('workout-content', 'wod-content')
+WORKOUT_XPATH = etree.XPath(
+    "//*[contains(@data-testid, 'workout')]"
+    + "".join(
+        f" | //*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+        for name in WORKOUT_CLASSES
+    )
+    + " | //div[contains(., 'Workout of the day')]"
+    + " | //h2[contains(., 'Workout')]"
+)
+
+# Main content area used when no workout-specific element is found:
+# the <main> element, else the first div with a content class
+MAIN_CONTENT_XPATHS = (
+    etree.XPath("(//main)[1]"),
+    etree.XPath("(//div[contains(@class, 'content')])[1]"),
+)
+
+# Visible text nodes below an element, skipping scripts and styles
+TEXT_XPATH = etree.XPath(".//text()[not(parent::script or parent::style)]")
+
+
+@dataclass(slots=True)
+class WorkoutData:
+    """One scraped workout, as saved to wod_YYMMDD.json and wods.jsonl."""
+    date: str
+    url: str
+    extracted_at: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    movements: List[Dict[str, str]] = field(default_factory=list)
+    featured_content: Optional[Dict[str, Any]] = None
+    social_description: Optional[str] = None
+    social_image: Optional[str] = None
+    comment_topics: Optional[List[str]] = None
+    navigation: Optional[Dict[str, Any]] = None
+    wod_data: Optional[Dict[str, Any]] = None
+    date_iso: Optional[str] = None
+    date_formatted: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'WorkoutData':
+        """Build from a saved JSON object, ignoring unknown keys."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+def utc_timestamp() -> str:
+    """Return the current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write data to path atomically via a temp file and os.replace."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def slice_json_object(text: bytes, marker: bytes) -> Optional[bytes]:
+    """Return the balanced {...} literal that follows marker in text.
+    
+    Braces are counted in a single pass; string literals are matched
+    whole so braces inside them do not affect the depth. Returns None when
+    marker is absent and raises ValueError when the object never closes.
+    """
+    idx = text.find(marker)
+    if idx == -1:
+        return None
+    start = text.find(b'{', idx + len(marker))
+    if start == -1:
+        return None
+        
+    depth = 0
+    for token in JSON_TOKEN_RE.finditer(text, start):
+        value = token.group()
+        if value == b'{':
+            depth += 1
+        elif value == b'}':
+            depth -= 1
+            if depth == 0:
+                return text[start:token.end()]
+                
+    raise ValueError(f"unbalanced braces after {marker.decode('ascii', 'replace')}")
+
+
+def extract_json_data(html: bytes, warnings: List[str]) -> Optional[Dict]:
+    """Extract JSON data from __PRELOADED_STATE__ script."""
+    try:
+        json_bytes = slice_json_object(html, PRELOADED_STATE_MARKER)
+    except ValueError as e:
+        warnings.append(f"Unterminated preloaded state in page: {e}")
+        return None
+    if json_bytes is None:
+        warnings.append("No preloaded state found in page")
+        return None
+        
+    try:
+        # Only the state object is decoded; the rest of the page stays bytes
+        return json_loads(json_bytes.decode('utf-8', errors='replace'))
+    except ValueError as e:
+        # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
+        warnings.append(f"Failed to extract JSON data: {e}")
+        
+    return None
+
+
+def element_text(element) -> str:
+    """Join the stripped text nodes below an element."""
+    return ''.join(text.strip() for text in TEXT_XPATH(element))
+
+
+def find_movement_fragments(value: Any) -> Iterator[str]:
+    """Yield HTML strings nested in JSON data that link to movement pages."""
+    if isinstance(value, str):
+        if '<a' in value and MOVEMENT_PATH in value:
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from find_movement_fragments(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from find_movement_fragments(item)
+
+
+def absolute_url(base_url: str, href: str) -> str:
+    """Resolve href against an origin-only base_url (no trailing slash).
+    
+    Site links are root-relative paths such as /251114 or /essentials/...,
+    which only need the origin prepended; anything else goes to urljoin.
+    """
+    if href.startswith('/') and not href.startswith('//'):
+        return base_url + href
+    return urljoin(base_url, href)
+
+
+def extract_movements(root, base_url: str) -> List[Dict[str, str]]:
+    """Collect the movement links below an element."""
+    movements = []
+    for link in MOVEMENT_XPATH(root):
+        href = link.get('href', '')
+        movements.append({
+            'name': element_text(link),
+            'link': href,
+            'url': absolute_url(base_url, href)
+        })
+    return movements
+
+
+def html_parser_for(html: bytes) -> lxml.html.HTMLParser:
+    """Pick a parser for raw page bytes: the page's own charset if declared, else UTF-8."""
+    head_end = html.find(b'</head>')
+    if META_CHARSET_RE.search(html, 0, head_end if head_end >= 0 else len(html)):
+        return HTML_PARSER
+    return UTF8_HTML_PARSER
+
+
+def workout_priority(element) -> int:
+    """Rank a WORKOUT_XPATH match by the selector it came from (lower wins).
+    
+    Ranks follow the original selector order: data-testid, then each of
+    WORKOUT_CLASSES in turn, then the "Workout of the day" div, then h2.
+    """
+    if 'workout' in element.get('data-testid', ''):
+        return 0
+    classes = element.get('class', '').split()
+    for rank, name in enumerate(WORKOUT_CLASSES, start=1):
+        if name in classes:
+            return rank
+    return len(WORKOUT_CLASSES) + (1 if element.tag == 'div' else 2)
+
+
+def extract_workout_content(html: bytes, json_data: Optional[Dict], base_url: str,
+                            warnings: List[str]) -> Dict[str, Any]:
+    """Extract workout content from HTML and JSON data."""
+    workout_data = {
+        'title': None,
+        'content': None,
+        'movements': [],
+        'featured_content': None
+    }
+    
+    try:
+        # Extract from JSON data first (more reliable)
+        if json_data and 'pages' in json_data:
+            page_data = json_data['pages']
+            
+            # Get basic page info
+            workout_data['title'] = page_data.get('title', '')
+            
+            # Extract social metadata
+            if 'socialMetaData' in page_data:
+                social = page_data['socialMetaData']
+                workout_data['social_description'] = social.get('description', '')
+                workout_data['social_image'] = social.get('image', '')
+            
+            # Extract comment topics
+            if 'commentTopics' in page_data:
+                workout_data['comment_topics'] = [
+                    topic.get('title', '') for topic in page_data['commentTopics']
+                ]
+            
+            # Extract components data
+            if 'components' in page_data:
+                for component in page_data['components']:
+                    if component.get('name') == 'DailyModule':
+                        props = component.get('props', {})
+                        
+                        # Navigation
+                        workout_data['navigation'] = {
+                            'previous': props.get('previousUrl'),
+                            'next': props.get('nextUrl'),
+                            'previous_label': props.get('previousDayLabelText'),
+                            'next_label': props.get('nextDayLabelText')
+                        }
+                        
+                        # Featured content
+                        if 'featuredContent' in props:
+                            featured = props['featuredContent']
+                            workout_data['featured_content'] = {
+                                'type': featured.get('type'),
+                                'content': featured
+                            }
+                        
+                        # Workout of the day data
+                        if 'workoutOfTheDay' in props:
+                            wod = props['workoutOfTheDay']
+                            workout_data['wod_data'] = wod
+        
+        # The JSON state already carries the workout and the chain link,
+        # so the page itself is only needed for what the JSON lacks
+        navigation = workout_data.get('navigation') or {}
+        json_complete = bool(workout_data.get('wod_data') and navigation.get('previous'))
+        
+        # The workout's own HTML is embedded in the JSON; parsing just
+        # those few KB for movement links avoids parsing the whole page
+        if json_complete:
+            for snippet in dict.fromkeys(find_movement_fragments(workout_data['wod_data'])):
+                fragment = lxml.html.fragment_fromstring(
+                    snippet, create_parent=True, parser=HTML_PARSER
+                )
+                workout_data['movements'].extend(extract_movements(fragment, base_url))
+            if workout_data['movements']:
+                return workout_data
+        
+        # Parse HTML for additional content, in the page's declared
+        # charset or UTF-8
+        tree = lxml.html.fromstring(html, parser=html_parser_for(html))
+        
+        # Extract movement links
+        workout_data['movements'].extend(extract_movements(tree, base_url))
+            
+        # Skip the text heuristics, which dominate per-page parse time
+        if json_complete:
+            return workout_data
+        
+        # Try to extract main workout content
+        # Look for common workout content patterns, keeping the texts
+        # of the highest-priority kind of match
+        content_parts: List[str] = []
+        best_priority = None
+        for elem in WORKOUT_XPATH(tree):
+            priority = workout_priority(elem)
+            if best_priority is not None and priority > best_priority:
+                continue
+            text = element_text(elem)
+            if text and len(text) > 10:  # Filter out very short texts
+                if best_priority is None or priority < best_priority:
+                    best_priority = priority
+                    content_parts = []
+                content_parts.append(text)
+                
+        if content_parts:
+            workout_data['content'] = '\n'.join(content_parts)
+                
+        # If no structured content found, try to extract from main content area
+        if not workout_data['content']:
+            main_content = None
+            for xpath in MAIN_CONTENT_XPATHS:
+                found = xpath(tree)
+                if found:
+                    main_content = found[0]
+                    break
+            if main_content is not None:
+                text = element_text(main_content)
+                # Try to find workout-relevant content
+                for pattern in WORKOUT_PATTERNS:
+                    matches = pattern.findall(text)
+                    if matches:
+                        workout_data['content'] = '\n'.join(matches)
+                        break
+        
+    except Exception as e:
+        warnings.append(f"Error extracting workout content: {e}")
+        
+    return workout_data
+
+
+def parse_page(html: bytes, base_url: str) -> Dict[str, Any]:
+    """Extract workout content from a fetched page.
+    
+    Module-level and free of logging: problems are returned under
+    'warnings' for the caller to log.
+    """
+    warnings: List[str] = []
+    json_data = extract_json_data(html, warnings)
+    workout_content = extract_workout_content(html, json_data, base_url, warnings)
+    return {'workout_content': workout_content, 'warnings': warnings}
+
+
+class PageNotFound(Exception):
+    """Raised when a workout page does not exist (HTTP 404)."""
+
 
 class CrossFitScraper:
-    def __init__(self, output_dir: str = "crossfit-wod-data", delay: float = 2.0):
+    def __init__(self, output_dir: str = "crossfit-wod-data", delay: float = 2.0,
+                 concurrency: int = 4, skip_existing: bool = True):
         self.base_url = "https://www.crossfit.com"
         self.output_dir = Path(output_dir)
         self.delay = delay
-        self.session = requests.Session()
+        # Shared by all prefetch workers: network requests start at least
+        # `delay` seconds apart no matter how many run concurrently
+        self.rate_lock = threading.Lock()
+        self.next_request_at = 0.0
+        # Number of pages fetched ahead of the confirmed chain
+        self.concurrency = max(1, concurrency)
+        # Reuse wod_YYMMDD.json files from earlier runs instead of re-fetching
+        self.skip_existing = skip_existing
+        # Background writer for per-date files while scrape_until_end runs,
+        # fed a batch every snapshot_batch_size saves
+        self.snapshot_executor: Optional[ThreadPoolExecutor] = None
+        self.snapshot_batch_size = 25
+        self.pending_snapshots: List[WorkoutData] = []
         
-        # Set user agent to identify as a research tool
+        # Create output directory
+        self.output_dir.mkdir(exist_ok=True)
+        
+        # Append-only store with one JSON line per workout, opened once
+        self.store_path = self.output_dir / "wods.jsonl"
+        self.store = open(self.store_path, 'ab')
+        atexit.register(self.store.close)
+        
+        # Cache responses on disk; past workouts never change, so re-runs
+        # only hit the network for new dates. Server cache headers still
+        # take precedence when present.
+        self.session = requests_cache.CachedSession(
+            self.output_dir / 'http_cache.sqlite',
+            backend='sqlite',
+            expire_after=requests_cache.NEVER_EXPIRE,
+            cache_control=True,
+            allowable_methods=('GET',),
+        )
+        
+        # Retry transient failures in the connection layer, backing off
+        # exponentially and honoring Retry-After on 429/503 responses
+        retry = Retry(
+            total=3,
+            backoff_factor=self.delay,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            allowed_methods=frozenset(['GET']),
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=10,
+            pool_maxsize=max(10, self.concurrency),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Set user agent to identify as a research tool. Accept-Encoding
+        # adds Brotli (br) only when a decoder such as brotli is installed.
         self.session.headers.update({
             'User-Agent': 'CrossFit-WOD-Scraper/1.0 (Educational Research Tool; Contact: research@example.com)',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         })
         
-        # Create output directory
-        self.output_dir.mkdir(exist_ok=True)
-        
         # Setup logging
         self.setup_logging()
         
@@ -56,10 +504,13 @@ class CrossFitScraper:
             'total_scraped': 0,
             'errors': 0,
             'skipped': 0,
-            'start_time': None,
-            'extracted_dates': []
+            'start_time': None
         }
         
+        # Dates on the chain this run walked, saved or skipped as already
+        # on disk, kept sorted as they are added
+        self.sorted_dates: List[str] = []
+        
     def setup_logging(self):
         """Setup logging configuration."""
         log_file = self.output_dir / "scraper.log"
@@ -77,21 +528,33 @@ class CrossFitScraper:
         # File handler
         file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
         
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        
+        # Records are queued by the scraping threads and formatted and
+        # written by a background listener, off the fetch/parse path
+        log_queue = queue.Queue(-1)
+        self.log_listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler
+        )
+        self.log_listener.start()
+        atexit.register(self.log_listener.stop)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
         
         self.logger = logger
         
-    def parse_date_from_url(self, url: str) -> Optional[str]:
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def parse_date_from_url(url: str) -> Optional[str]:
         """Extract YYMMDD date from URL."""
-        match = re.search(r'/(\d{6})$', url)
+        match = DATE_RE.search(url)
         return match.group(1) if match else None
         
-    def parse_yymmdd_to_date(self, yymmdd: str) -> Optional[datetime]:
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def parse_yymmdd_to_date(yymmdd: str) -> Optional[datetime]:
         """Convert YYMMDD to datetime object."""
         try:
             # Assuming 2000s for YY
@@ -102,294 +565,339 @@ class CrossFitScraper:
         except ValueError:
             return None
             
-    def fetch_page(self, url: str, retries: int = 3) -> Optional[str]:
-        """Fetch a webpage with retry logic."""
-        for attempt in range(retries):
-            try:
-                self.logger.info(f"Fetching: {url} (attempt {attempt + 1}/{retries})")
-                
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                
-                self.logger.info(f"Successfully fetched {len(response.content)} bytes")
-                return response.text
-                
-            except requests.RequestException as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < retries - 1:
-                    # Exponential backoff
-                    wait_time = (2 ** attempt) * self.delay
-                    self.logger.info(f"Waiting {wait_time:.1f} seconds before retry...")
-                    time.sleep(wait_time)
-                else:
-                    self.logger.error(f"Failed to fetch {url} after {retries} attempts")
-                    return None
-                    
-        return None
-        
-    def extract_json_data(self, html: str) -> Optional[Dict]:
-        """Extract JSON data from __PRELOADED_STATE__ script."""
-        try:
-            # Find the JSON data in the script tag
-            pattern = r'window\.__PRELOADED_STATE__\s*=\s*({.*?});'
-            match = re.search(pattern, html, re.DOTALL)
-            
-            if match:
-                json_str = match.group(1)
-                # Clean up the JSON string
-                json_str = re.sub(r'(\w+):', r'"\1":', json_str)  # Quote unquoted keys
-                data = json.loads(json_str)
-                return data
-                
-        except (json.JSONDecodeError, AttributeError) as e:
-            self.logger.warning(f"Failed to extract JSON data: {e}")
+    def guess_previous_url(self, url: str, days_back: int = 1) -> Optional[str]:
+        """Guess the URL days_back days before the YYMMDD date in a URL."""
+        date_str = self.parse_date_from_url(url)
+        date_obj = self.parse_yymmdd_to_date(date_str) if date_str else None
+        if not date_obj:
+            return None
+        previous = (date_obj - timedelta(days=days_back)).strftime('%y%m%d')
+        return f"{self.base_url}/{previous}"
             
-        return None
+    def wait_for_request_slot(self):
+        """Block until this thread may start a network request.
         
-    def extract_workout_content(self, html: str, json_data: Dict) -> Dict[str, Any]:
-        """Extract workout content from HTML and JSON data."""
-        workout_data = {
-            'title': None,
-            'content': None,
-            'movements': [],
-            'featured_content': None
-        }
+        Slots are handed out `delay` seconds apart under a lock, so the
+        request rate stays the same whatever the concurrency.
+        """
+        with self.rate_lock:
+            now = time.monotonic()
+            start = max(now, self.next_request_at)
+            self.next_request_at = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+            
+    def fetch_page(self, url: str) -> Optional[bytes]:
+        """Fetch a webpage's raw bytes; retries are handled by the session's adapter.
         
+        Raises PageNotFound for a 404 so callers can tell a missing day
+        from a failed request.
+        """
         try:
-            # Extract from JSON data first (more reliable)
-            if json_data and 'pages' in json_data:
-                page_data = json_data['pages']
-                
-                # Get basic page info
-                workout_data['title'] = page_data.get('title', '')
-                
-                # Extract social metadata
-                if 'socialMetaData' in page_data:
-                    social = page_data['socialMetaData']
-                    workout_data['social_description'] = social.get('description', '')
-                    workout_data['social_image'] = social.get('image', '')
-                
-                # Extract comment topics
-                if 'commentTopics' in page_data:
-                    workout_data['comment_topics'] = [
-                        topic.get('title', '') for topic in page_data['commentTopics']
-                    ]
-                
-                # Extract components data
-                if 'components' in page_data:
-                    for component in page_data['components']:
-                        if component.get('name') == 'DailyModule':
-                            props = component.get('props', {})
-                            
-                            # Navigation
-                            workout_data['navigation'] = {
-                                'previous': props.get('previousUrl'),
-                                'next': props.get('nextUrl'),
-                                'previous_label': props.get('previousDayLabelText'),
-                                'next_label': props.get('nextDayLabelText')
-                            }
-                            
-                            # Featured content
-                            if 'featuredContent' in props:
-                                featured = props['featuredContent']
-                                workout_data['featured_content'] = {
-                                    'type': featured.get('type'),
-                                    'content': featured
-                                }
-                            
-                            # Workout of the day data
-                            if 'workoutOfTheDay' in props:
-                                wod = props['workoutOfTheDay']
-                                workout_data['wod_data'] = wod
-            
-            # Parse HTML for additional content
-            soup = BeautifulSoup(html, 'lxml')
-            
-            # Extract movement links
-            movement_links = soup.find_all('a', href=re.compile(r'/essentials/'))
-            for link in movement_links:
-                workout_data['movements'].append({
-                    'name': link.get_text(strip=True),
-                    'link': link.get('href', ''),
-                    'url': urljoin(self.base_url, link.get('href', ''))
-                })
-            
-            # Try to extract main workout content
-            # Look for common workout content patterns
-            workout_selectors = [
-                '[data-testid*="workout"]',
-                '.workout-content',
-                '.wod-content',
-                'div:contains("Workout of the day")',
-                'h2:contains("Workout")',
-            ]
-            
-            for selector in workout_selectors:
-                try:
-                    elements = soup.select(selector)
-                    if elements:
-                        content_parts = []
-                        for elem in elements:
-                            text = elem.get_text(strip=True)
-                            if text and len(text) > 10:  # Filter out very short texts
-                                content_parts.append(text)
-                        
-                        if content_parts:
-                            workout_data['content'] = '\n'.join(content_parts)
-                            break
-                except:
-                    continue
-                    
-            # If no structured content found, try to extract from main content area
-            if not workout_data['content']:
-                main_content = soup.find('main') or soup.find('div', class_=re.compile(r'content'))
-                if main_content:
-                    text = main_content.get_text(strip=True)
-                    # Try to find workout-relevant content
-                    workout_patterns = [
-                        r'(?:Workout|WOD).*?(?=\n\n|$)',
-                        r'(?:Round|Time|AMRAP|EMOM|RFT).*?(?=\n\n|$)',
-                        r'\d+.*?(?:reps|rounds?|cal|lb|kg|m).*?(?=\n\n|$)'
-                    ]
-                    
-                    for pattern in workout_patterns:
-                        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-                        if matches:
-                            workout_data['content'] = '\n'.join(matches)
-                            break
+            self.logger.debug("Fetching: %s", url)
             
-        except Exception as e:
-            self.logger.warning(f"Error extracting workout content: {e}")
+            # Serve cached pages without waiting; a miss comes back as 504
+            response = self.session.get(url, timeout=30, only_if_cached=True)
             
-        return workout_data
+            if response.status_code == 504:
+                self.wait_for_request_slot()
+                response = self.session.get(url, timeout=30)
+                self.logger.debug("Fetched %d bytes (HTTP %d)", len(response.content),
+                                  response.status_code)
+            else:
+                self.logger.debug("Loaded %d bytes from cache", len(response.content))
+                
+            if response.status_code == 404:
+                raise PageNotFound(url)
+            response.raise_for_status()
+            return response.content
+            
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to fetch {url}: {e}")
+            return None
+        
+    def parse_html(self, html: bytes) -> Dict[str, Any]:
+        """Parse a page and log its warnings."""
+        result = parse_page(html, self.base_url)
+        for warning in result['warnings']:
+            self.logger.warning(warning)
+        return result['workout_content']
+        
+    def extract_workout_data(self, url: str,
+                             extracted_at: Optional[str] = None) -> Optional[WorkoutData]:
+        """Extract complete workout data from a URL.
         
-    def extract_workout_data(self, url: str) -> Optional[Dict[str, Any]]:
-        """Extract complete workout data from a URL."""
+        extracted_at lets callers stamp the pages submitted together with
+        one shared timestamp; it defaults to the current UTC time.
+        """
         date_str = self.parse_date_from_url(url)
         if not date_str:
             self.logger.error(f"Could not extract date from URL: {url}")
             return None
             
-        self.logger.info(f"Extracting workout data for date: {date_str}")
+        self.logger.debug("Extracting workout data for date: %s", date_str)
         
         # Fetch the page
         html = self.fetch_page(url)
         if not html:
             return None
             
-        # Extract JSON data
-        json_data = self.extract_json_data(html)
-        
-        # Extract workout content
-        workout_content = self.extract_workout_content(html, json_data)
+        # Extract JSON data and workout content
+        workout_content = self.parse_html(html)
         
         # Build complete data structure
-        workout_data = {
-            'date': date_str,
-            'url': url,
-            'extracted_at': datetime.now().isoformat() + 'Z',
+        workout_data = WorkoutData(
+            date=date_str,
+            url=url,
+            extracted_at=extracted_at or utc_timestamp(),
             **workout_content
-        }
+        )
         
         # Add date conversion
         date_obj = self.parse_yymmdd_to_date(date_str)
         if date_obj:
-            workout_data['date_iso'] = date_obj.isoformat()
-            workout_data['date_formatted'] = date_obj.strftime('%B %d, %Y')
+            workout_data.date_iso = date_obj.isoformat()
+            workout_data.date_formatted = date_obj.strftime('%B %d, %Y')
             
         return workout_data
         
-    def save_workout_data(self, workout_data: Dict[str, Any]):
-        """Save workout data to file."""
-        date_str = workout_data['date']
-        filename = f"wod_{date_str}.json"
-        filepath = self.output_dir / filename
+    def save_workout_data(self, workout_data: WorkoutData):
+        """Save workout data to the store and its per-date file.
+        
+        The workout is appended as one line to wods.jsonl, which is the
+        only write on the scraping path. While a scrape is running, the
+        wod_YYMMDD.json file is queued and written later with its batch.
+        """
+        date_str = workout_data.date
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(workout_data, f, indent=2, ensure_ascii=False)
+            self.store.write(json_dumps(workout_data, indent=False) + b'\n')
+            self.store.flush()
             
-            self.logger.info(f"Saved workout data to: {filepath}")
+            if self.snapshot_executor:
+                self.pending_snapshots.append(workout_data)
+                if len(self.pending_snapshots) >= self.snapshot_batch_size:
+                    self.flush_snapshots()
+            else:
+                self.write_snapshot(workout_data)
+            
+            self.logger.info(f"Saved workout data for {date_str} to: {self.store_path}")
             self.stats['total_scraped'] += 1
-            self.stats['extracted_dates'].append(date_str)
+            bisect.insort(self.sorted_dates, date_str)
             
         except Exception as e:
             self.logger.error(f"Failed to save workout data: {e}")
             self.stats['errors'] += 1
             
+    def flush_snapshots(self):
+        """Hand the queued per-date files to the background writer as one batch."""
+        if self.pending_snapshots:
+            self.snapshot_executor.submit(self.write_snapshots, self.pending_snapshots)
+            self.pending_snapshots = []
+            
+    def write_snapshots(self, batch: List[WorkoutData]):
+        """Write the per-date files for a batch of saved workouts."""
+        for workout_data in batch:
+            self.write_snapshot(workout_data)
+            
+    def write_snapshot(self, workout_data: WorkoutData):
+        """Write a workout's per-date file atomically."""
+        filepath = self.output_dir / f"wod_{workout_data.date}.json"
+        try:
+            write_atomic(filepath, json_dumps(workout_data))
+        except Exception as e:
+            self.logger.error(f"Failed to write {filepath}: {e}")
+            
     def update_index(self):
-        """Update the main index file with all extracted workouts."""
+        """Update the index summary file.
+        
+        Workouts are appended to wods.jsonl as they are saved, so the index
+        stays small no matter how long the crawl runs.
+        """
         index_file = self.output_dir / "index.json"
         index_data = {
-            'last_updated': datetime.now().isoformat() + 'Z',
-            'total_workouts': self.stats['total_scraped'],
-            'extracted_dates': sorted(self.stats['extracted_dates']),
+            'last_updated': utc_timestamp(),
+            'total_workouts': len(self.sorted_dates),
+            'first_date': self.sorted_dates[0] if self.sorted_dates else None,
+            'last_date': self.sorted_dates[-1] if self.sorted_dates else None,
+            'store_file': self.store_path.name,
             'stats': self.stats
         }
         
         try:
-            with open(index_file, 'w', encoding='utf-8') as f:
-                json.dump(index_data, f, indent=2, ensure_ascii=False)
+            write_atomic(index_file, json_dumps(index_data))
             
             self.logger.info(f"Updated index file: {index_file}")
             
         except Exception as e:
             self.logger.error(f"Failed to update index file: {e}")
             
+    def saved_workout_path(self, url: str) -> Optional[Path]:
+        """Return the saved workout file for url if it can be reused."""
+        if not self.skip_existing:
+            return None
+        date_str = self.parse_date_from_url(url)
+        if not date_str:
+            return None
+        filepath = self.output_dir / f"wod_{date_str}.json"
+        return filepath if filepath.exists() else None
+        
+    def load_saved_workout(self, filepath: Path) -> Optional[WorkoutData]:
+        """Load a workout saved by an earlier run."""
+        try:
+            data = json_loads(filepath.read_bytes())
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+            return WorkoutData.from_dict(data)
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.warning(f"Could not reuse {filepath}, fetching again: {e}")
+            return None
+            
+    def candidate_urls(self, url: str, end_date: Optional[str] = None) -> Iterator[str]:
+        """Yield url followed by the URLs of each earlier day, stopping at end_date.
+        
+        URLs are strictly /YYMMDD per day, so candidates are enumerated by
+        date arithmetic from url rather than discovered page by page.
+        """
+        yield url
+        for days_back in itertools.count(1):
+            candidate = self.guess_previous_url(url, days_back)
+            if not candidate:
+                return
+            if end_date and self.parse_date_from_url(candidate) < end_date:
+                return
+            yield candidate
+            
+    def prefetch(self, executor: ThreadPoolExecutor, pending: Dict[str, Future],
+                 current_url: str, remaining: Optional[int], end_date: Optional[str],
+                 extracted_at: str):
+        """Keep the window of speculative fetches ahead of current_url full.
+        
+        Pages submitted in this call are stamped with extracted_at.
+        """
+        window = self.concurrency if remaining is None else min(self.concurrency, remaining)
+        for i, url in enumerate(self.candidate_urls(current_url, end_date)):
+            if i >= window:
+                break
+            if url not in pending and not self.saved_workout_path(url):
+                pending[url] = executor.submit(self.extract_workout_data, url, extracted_at)
+                
+    def discard_pending(self, pending: Dict[str, Future]):
+        """Drop speculative fetches that turned out to be off the chain."""
+        for future in pending.values():
+            future.cancel()
+        pending.clear()
+            
     def scrape_until_end(self, start_url: str, max_count: Optional[int] = None, 
                         end_date: Optional[str] = None):
-        """Scrape workouts starting from start_url and following previous links."""
+        """Scrape workouts starting from start_url and following previous links.
+        
+        Earlier days are enumerated by YYMMDD date arithmetic and fetched in
+        parallel ahead of the chain. A parsed `navigation.previous` link
+        corrects the enumeration: guesses that do not match it are discarded
+        and the linked URL is fetched instead. The scrape stops at the first
+        day on the chain that returns 404.
+        """
         self.logger.info(f"Starting scrape from: {start_url}")
-        self.stats['start_time'] = datetime.now()
+        self.stats['start_time'] = datetime.now(timezone.utc)
+        
+        pending: Dict[str, Future] = {}
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.snapshot_executor = ThreadPoolExecutor(max_workers=1)
+        
+        try:
+            self._scrape_chain(executor, pending, start_url, max_count, end_date)
+        finally:
+            self.discard_pending(pending)
+            executor.shutdown(wait=True)
+            # Write the last partial batch of per-date files and wait for it
+            self.flush_snapshots()
+            self.snapshot_executor.shutdown(wait=True)
+            self.snapshot_executor = None
+            
+        # Final index update
+        self.update_index()
+        
+        # Log final statistics
+        duration = datetime.now(timezone.utc) - self.stats['start_time']
+        self.logger.info(f"Scraping completed in {duration}")
+        self.logger.info(f"Total workouts scraped: {self.stats['total_scraped']}")
+        self.logger.info(f"Already saved, skipped: {self.stats['skipped']}")
+        self.logger.info(f"Errors encountered: {self.stats['errors']}")
         
-        current_url = start_url
+    def _scrape_chain(self, executor: ThreadPoolExecutor, pending: Dict[str, Future],
+                      current_url: str, max_count: Optional[int], end_date: Optional[str]):
+        """Follow previous links from current_url, saving each workout."""
         scraped_count = 0
         
         while current_url and (max_count is None or scraped_count < max_count):
-            # Check if we should stop based on date
+            # Check if we should stop based on date; zero-padded YYMMDD
+            # strings compare in date order, so no datetime is built here
             if end_date:
                 current_date = self.parse_date_from_url(current_url)
                 if current_date and current_date < end_date:
                     self.logger.info(f"Reached end date {end_date}, stopping scrape")
                     break
             
-            # Extract workout data
-            workout_data = self.extract_workout_data(current_url)
-            if not workout_data:
-                self.logger.error(f"Failed to extract data from {current_url}")
-                self.stats['errors'] += 1
-                break
-                
-            # Save the data
-            self.save_workout_data(workout_data)
+            # Reuse a workout saved by an earlier run; it also holds the
+            # previous link, so neither a request nor a parse is needed
+            saved_path = self.saved_workout_path(current_url)
+            workout_data = self.load_saved_workout(saved_path) if saved_path else None
+            
+            if workout_data:
+                self.logger.info(f"Skipping {current_url}, already saved to {saved_path}")
+                self.stats['skipped'] += 1
+                # Keep the index's date range covering the whole chain walked
+                bisect.insort(self.sorted_dates, workout_data.date)
+            else:
+                # Extract workout data, fetching ahead while we wait
+                remaining = None if max_count is None else max_count - scraped_count
+                # One timestamp per step, shared by the pages it submits
+                extracted_at = utc_timestamp()
+                self.prefetch(executor, pending, current_url, remaining, end_date,
+                              extracted_at)
+                future = pending.pop(current_url, None)
+                if future is None:
+                    # Saved file was unreadable, so it was never prefetched
+                    future = executor.submit(self.extract_workout_data, current_url,
+                                             extracted_at)
+                try:
+                    workout_data = future.result()
+                except PageNotFound:
+                    self.logger.info(f"No workout page at {current_url} - reached the end of the archive")
+                    break
+                if not workout_data:
+                    self.logger.error(f"Failed to extract data from {current_url}")
+                    self.stats['errors'] += 1
+                    break
+                    
+                # Save the data
+                self.save_workout_data(workout_data)
             scraped_count += 1
             
             # Update index periodically
             if scraped_count % 10 == 0:
                 self.update_index()
                 
-            # Get the previous day's URL
-            navigation = workout_data.get('navigation', {})
-            previous_url = navigation.get('previous')
+            # Get the previous day's URL. The page's own link is trusted as
+            # a correction (it skips missing days); pages without navigation
+            # state fall back to the previous calendar day
+            navigation = workout_data.navigation
+            if navigation is None:
+                previous_url = self.guess_previous_url(current_url)
+            else:
+                previous_url = navigation.get('previous')
             
             if not previous_url:
                 self.logger.info("No previous link found - reached the oldest available workout")
                 break
                 
-            current_url = urljoin(self.base_url, previous_url)
+            current_url = absolute_url(self.base_url, previous_url)
             
-            # Rate limiting
-            self.logger.info(f"Waiting {self.delay} seconds before next request...")
-            time.sleep(self.delay)
-            
-        # Final index update
-        self.update_index()
-        
-        # Log final statistics
-        duration = datetime.now() - self.stats['start_time']
-        self.logger.info(f"Scraping completed in {duration}")
-        self.logger.info(f"Total workouts scraped: {self.stats['total_scraped']}")
-        self.logger.info(f"Errors encountered: {self.stats['errors']}")
+            # Discard guesses that are not on the real chain
+            if pending and current_url not in pending and not self.saved_workout_path(current_url):
+                self.logger.info(f"Previous link {previous_url} was not prefetched, discarding guesses")
+                self.discard_pending(pending)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -439,10 +947,23 @@ Examples:
     parser.add_argument(
         '--delay',
         type=float,
-        help='Delay between requests in seconds',
+        help='Minimum delay between network requests in seconds (shared by all workers)',
         default=2.0
     )
     
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        help='Number of workout pages fetched ahead in parallel',
+        default=4
+    )
+    
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Re-scrape dates that already have a saved wod_YYMMDD.json file'
+    )
+    
     args = parser.parse_args()
     
     # Determine start URL
@@ -454,7 +975,12 @@ Examples:
         start_url = f"https://www.crossfit.com/{today}"
     
     # Create scraper
-    scraper = CrossFitScraper(output_dir=args.output_dir, delay=args.delay)
+    scraper = CrossFitScraper(
+        output_dir=args.output_dir,
+        delay=args.delay,
+        concurrency=args.concurrency,
+        skip_existing=not args.refresh
+    )
     
     try:
         # Start scraping